@@ -1,10 +1,14 @@
+import asyncio
 from fastapi import Depends, HTTPException, status, Header
 from jose import JWTError
 from app.models import TokenData
-from app.utils.hashing import verify_password, hash_password
+from app.utils.hashing import verify_password, hash_password, needs_rehash
 from app.utils.jwt_handler import create_access_token as create_jwt_token, verify_access_token
 from app.database import get_database
 
+# Keep references to background rehash tasks so they are not garbage collected
+_rehash_tasks = set()
+
 def create_access_token(data: dict):
     """Create JWT access token."""
     return create_jwt_token(data)
@@ -32,11 +36,34 @@ async def signup_user(email: str, password: str):
     if user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Hash password and create user
-    hashed_pw = hash_password(password)
+    # Hash password off the event loop and create user
+    loop = asyncio.get_running_loop()
+    hashed_pw = await loop.run_in_executor(None, hash_password, password)
     await db["users"].insert_one({"email": email, "password": hashed_pw})
     return {"message": "User created successfully"}
 
+async def rehash_user_password(db, user: dict, password: str):
+    """
+    Re-hash a user's password at the current bcrypt work factor.
+
+    The update only applies if the stored hash is unchanged, so a password
+    change made in the meantime is never overwritten.
+
+    Args:
+        db: Database instance
+        user: User document as loaded at login
+        password: Verified plain text password
+    """
+    try:
+        loop = asyncio.get_running_loop()
+        new_hash = await loop.run_in_executor(None, hash_password, password)
+        await db["users"].update_one(
+            {"_id": user["_id"], "password": user["password"]},
+            {"$set": {"password": new_hash}}
+        )
+    except Exception as e:
+        print(f"❌ Failed to rehash password for {user.get('email')}: {e}")
+
 async def login_user(email: str, password: str):
     """
     Log in a user.
@@ -55,10 +82,19 @@ async def login_user(email: str, password: str):
     if db is None:
         raise HTTPException(status_code=500, detail="Database connection failed")
 
-    # Find user by email
+    # Find user by email and verify the password off the event loop
     user = await db["users"].find_one({"email": email})
-    if not user or not verify_password(password, user["password"]):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, verify_password, password, user["password"]):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Upgrade hashes made at an outdated cost without delaying the response
+    if needs_rehash(user["password"]):
+        task = asyncio.create_task(rehash_user_password(db, user, password))
+        _rehash_tasks.add(task)
+        task.add_done_callback(_rehash_tasks.discard)
 
     # Create access token
     token = create_access_token({"email": user["email"], "id": str(user["_id"]), "sub": user["email"]})
@@ -41,6 +41,9 @@ class Database:
             return self.db[collection_name]
         return None
 
+# Collection holding app-wide settings and one-off job markers
+CONFIG_COLLECTION = "config"
+
 # Create a global database instance
 database = Database()
 
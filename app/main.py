@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from app.routes import users, payments, auth
 from app.database import connect_to_mongo, close_mongo_connection, get_database
+from app.utils.hashing import load_or_calibrate_rounds, get_rounds
+from app.utils.payment_lifecycle import start_payment_lifecycle, stop_payment_lifecycle
 
 # Load environment variables
 load_dotenv()
@@ -29,12 +31,24 @@ app.include_router(payments.router, prefix="/api/v1/payments", tags=["payments"]
 
 @app.on_event("startup")
 async def startup_db_client():
-    """Connect to MongoDB on startup."""
-    await connect_to_mongo()
+    """Connect to MongoDB on startup and start payment lifecycle management."""
+    if await connect_to_mongo():
+        start_payment_lifecycle(get_database())
+
+@app.on_event("startup")
+async def calibrate_password_hashing():
+    """Load the shared bcrypt work factor, calibrating it on first start."""
+    try:
+        rounds = await load_or_calibrate_rounds(get_database())
+        print(f"🔐 Using bcrypt work factor {rounds}")
+    except Exception as e:
+        # Calibrating locally would let workers disagree on the cost
+        print(f"❌ Shared bcrypt work factor not loaded, using default {get_rounds()}: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    """Close MongoDB connection on shutdown."""
+    """Stop payment lifecycle work and close MongoDB connection on shutdown."""
+    await stop_payment_lifecycle()
     await close_mongo_connection()
 
 @app.get("/")
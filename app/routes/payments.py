@@ -4,8 +4,10 @@ from app.models import Payment, PaymentCreate, PaymentUpdate
 from app.auth import get_current_active_user
 import razorpay
 import os
+from datetime import datetime
 from fastapi import Header
 from app.database import get_database
+from app.utils.payment_lifecycle import find_payment
 from app.utils.jwt_handler import verify_access_token
 
 router = APIRouter()
@@ -39,7 +41,8 @@ async def create_payment(amount: int, current_user=Depends(get_current_active_us
         return {"error": "Invalid user token"}
     order = razorpay_client.order.create({"amount": amount*100, "currency": "INR"})
     await db["payments"].insert_one({
-        "order_id": order["id"], "user_id": user_id, "amount": amount, "status": "created"
+        "order_id": order["id"], "user_id": user_id, "amount": amount, "status": "created",
+        "created_at": datetime.utcnow()
     })
     return order
 
@@ -52,11 +55,39 @@ async def verify_payment(order_id: str, payment_id: str, signature: str, current
             'razorpay_payment_id': payment_id,
             'razorpay_signature': signature
         })
-        await db["payments"].update_one({"order_id": order_id}, {"$set": {"status": "paid"}})
-        return {"status": "Payment Verified"}
     except Exception:
         return {"status": "Verification Failed"}
 
+    # Already-paid orders keep their original payment_id and paid_at
+    paid = {"status": "paid", "payment_id": payment_id, "paid_at": datetime.utcnow()}
+    result = await db["payments"].update_one(
+        {"order_id": order_id, "status": {"$ne": "paid"}}, {"$set": paid}
+    )
+    if result.matched_count == 0 and await find_payment(db, {"order_id": order_id}) is None:
+        # The unpaid order expired before payment completed; rebuild it from Razorpay
+        user_id = getattr(current_user, 'id', None) or getattr(current_user, 'username', None)
+        order = razorpay_client.order.fetch(order_id)
+        await db["payments"].update_one({"order_id": order_id}, {
+            "$setOnInsert": {
+                **paid,
+                "user_id": user_id,
+                "amount": order["amount"] // 100,
+                "created_at": datetime.utcfromtimestamp(order["created_at"])
+            }
+        }, upsert=True)
+    return {"status": "Payment Verified"}
+
+@router.get("/orders/{order_id}")
+async def get_order(order_id: str, current_user=Depends(get_current_active_user)):
+    """Get a Razorpay order's payment record, including archived ones."""
+    db = get_database()
+    user_id = getattr(current_user, 'id', None) or getattr(current_user, 'username', None)
+    payment = await find_payment(db, {"order_id": order_id, "user_id": user_id})
+    if payment is None:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    payment["_id"] = str(payment["_id"])
+    return payment
+
 @router.get("/", response_model=List[Payment])
 async def get_payments(current_user = Depends(get_current_active_user)):
     """Get all payments for the current user."""
@@ -1,8 +1,168 @@
+import asyncio
 import bcrypt
+import os
+import time
+from pymongo.errors import DuplicateKeyError
+from app.database import CONFIG_COLLECTION
+
+# Work factor bounds; each extra round doubles the cost of a hash.
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+# Per-hash latency budget used by calibrate_rounds()
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+
+# Config document holding the work factor shared by every worker and node
+BCRYPT_CONFIG_ID = "bcrypt_rounds"
+
+def _clamp_rounds(rounds: int) -> int:
+    """Clamp a work factor into [BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS]."""
+    return max(BCRYPT_MIN_ROUNDS, min(rounds, BCRYPT_MAX_ROUNDS))
+
+# Current work factor; BCRYPT_ROUNDS pins it and disables calibration
+_rounds = _clamp_rounds(int(os.getenv("BCRYPT_ROUNDS", "12")))
+
+def _time_hash(rounds: int, samples: int = 3) -> float:
+    """Return the fastest of `samples` hashes at the given cost, in seconds."""
+    salt = bcrypt.gensalt(rounds=rounds)
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _measure_rounds(target_ms: float) -> int:
+    """
+    Find the highest work factor whose hash fits the latency budget on this host.
+
+    Times a hash at BCRYPT_MIN_ROUNDS and doubles the estimate per round
+    until the next step would exceed the budget.
+    """
+    budget = target_ms / 1000
+    rounds = BCRYPT_MIN_ROUNDS
+    elapsed = _time_hash(rounds)
+    while rounds < BCRYPT_MAX_ROUNDS and elapsed * 2 <= budget:
+        rounds += 1
+        elapsed *= 2
+    return rounds
+
+def calibrate_rounds(target_ms: float = None) -> int:
+    """
+    Pick the bcrypt work factor that best fits the latency budget on this host.
+
+    Skipped when BCRYPT_ROUNDS is set explicitly.
+
+    Args:
+        target_ms: Per-hash latency budget in milliseconds (defaults to BCRYPT_TARGET_MS)
+
+    Returns:
+        The work factor now used by hash_password
+    """
+    pinned = os.getenv("BCRYPT_ROUNDS")
+    if pinned:
+        set_rounds(int(pinned))
+        return _rounds
+
+    set_rounds(_measure_rounds(target_ms if target_ms is not None else BCRYPT_TARGET_MS))
+    return _rounds
+
+def _calibration_settings() -> dict:
+    """Settings a stored work factor was calibrated against."""
+    return {
+        "target_ms": BCRYPT_TARGET_MS,
+        "min_rounds": BCRYPT_MIN_ROUNDS,
+        "max_rounds": BCRYPT_MAX_ROUNDS,
+    }
+
+async def load_or_calibrate_rounds(db) -> int:
+    """
+    Load the shared bcrypt work factor, calibrating it when needed.
+
+    The work factor is stored with the settings it was calibrated against.
+    When none is stored, or those settings differ from this process's
+    configuration, it is recalibrated and written back with a compare-and-set,
+    so concurrent workers converge on a single value. BCRYPT_ROUNDS overrides it.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        The work factor now used by hash_password
+
+    Raises:
+        RuntimeError: If no database is available to share the value through
+    """
+    pinned = os.getenv("BCRYPT_ROUNDS")
+    if pinned:
+        set_rounds(int(pinned))
+        return _rounds
+    if db is None:
+        raise RuntimeError("Database connection failed")
+
+    config = db[CONFIG_COLLECTION]
+    settings = _calibration_settings()
+    stored = await config.find_one({"_id": BCRYPT_CONFIG_ID})
+    if stored is None or any(stored.get(key) != value for key, value in settings.items()):
+        loop = asyncio.get_running_loop()
+        rounds = await loop.run_in_executor(None, _measure_rounds, BCRYPT_TARGET_MS)
+        update = {"rounds": rounds, **settings}
+        if stored is None:
+            try:
+                await config.update_one(
+                    {"_id": BCRYPT_CONFIG_ID}, {"$setOnInsert": update}, upsert=True
+                )
+            except DuplicateKeyError:
+                pass
+        else:
+            # Only replace the document we read; a concurrent recalibration wins
+            await config.update_one(dict(stored), {"$set": update})
+        stored = await config.find_one({"_id": BCRYPT_CONFIG_ID})
+
+    set_rounds(stored["rounds"])
+    return _rounds
+
+def set_rounds(rounds: int):
+    """Set the work factor used for new hashes, within the configured bounds."""
+    global _rounds
+    _rounds = _clamp_rounds(rounds)
+
+def get_rounds() -> int:
+    """Get the work factor used for new hashes."""
+    return _rounds
+
+def get_hash_rounds(hashed: str) -> int:
+    """
+    Extract the work factor from a bcrypt hash.
+
+    Args:
+        hashed: Hash in modular crypt format, e.g. "$2b$12$..."
+
+    Returns:
+        Work factor of the hash
+    """
+    return int(hashed.split("$")[2])
+
+def needs_rehash(hashed: str) -> bool:
+    """
+    Check whether a stored hash was made with a different work factor.
+
+    Hashes are rehashed in both directions, so lowering the budget buys
+    back auth throughput as users sign in.
+
+    Args:
+        hashed: Hashed password to check
+
+    Returns:
+        True if the hash should be regenerated at the current cost
+    """
+    try:
+        return get_hash_rounds(hashed) != _rounds
+    except (IndexError, ValueError):
+        return False
 
 def hash_password(password: str) -> str:
     """
-    Hash a password using bcrypt.
+    Hash a password using bcrypt at the current work factor.
     
     Args:
         password: Plain text password
@@ -10,7 +170,7 @@ def hash_password(password: str) -> str:
     Returns:
         Hashed password string
     """
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=_rounds)).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     """
@@ -35,4 +195,45 @@ def get_password_hash(password: str) -> str:
     Returns:
         Hashed password string
     """
-    return hash_password(password) 
\ No newline at end of file
+    return hash_password(password)
+
+def benchmark(min_rounds: int = None, max_rounds: int = None, samples: int = 3) -> list:
+    """
+    Measure single-core bcrypt throughput at each work factor.
+
+    Args:
+        min_rounds: Lowest cost to measure (defaults to BCRYPT_MIN_ROUNDS)
+        max_rounds: Highest cost to measure (defaults to BCRYPT_MAX_ROUNDS)
+        samples: Hashes timed per cost; the fastest is kept
+
+    Returns:
+        List of dicts with rounds, ms_per_hash, hashes_per_sec_per_core
+        and hashes_per_sec (estimate across all cores)
+    """
+    low = min_rounds if min_rounds is not None else BCRYPT_MIN_ROUNDS
+    high = max_rounds if max_rounds is not None else BCRYPT_MAX_ROUNDS
+    cores = os.cpu_count() or 1
+    results = []
+    for rounds in range(low, high + 1):
+        elapsed = _time_hash(rounds, samples)
+        results.append({
+            "rounds": rounds,
+            "ms_per_hash": elapsed * 1000,
+            "hashes_per_sec_per_core": 1 / elapsed,
+            "hashes_per_sec": cores / elapsed,
+        })
+    return results
+
+if __name__ == "__main__":
+    # Usage: python -m app.utils.hashing [min_rounds] [max_rounds]
+    import sys
+
+    args = [int(a) for a in sys.argv[1:3]]
+    print(f"cores: {os.cpu_count() or 1}, target: {BCRYPT_TARGET_MS:.0f} ms/hash")
+    print(f"{'rounds':>6} {'ms/hash':>10} {'hash/s/core':>12} {'hash/s (all)':>13}")
+    for row in benchmark(*args):
+        print(
+            f"{row['rounds']:>6} {row['ms_per_hash']:>10.1f} "
+            f"{row['hashes_per_sec_per_core']:>12.2f} {row['hashes_per_sec']:>13.2f}"
+        )
+    print(f"calibrated rounds: {calibrate_rounds()}")
@@ -0,0 +1,262 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from app.database import CONFIG_COLLECTION
+
+# Unpaid ("created") orders older than this are expired by MongoDB; 0 disables
+PAYMENT_UNPAID_TTL_SECONDS = int(os.getenv("PAYMENT_UNPAID_TTL_SECONDS", "86400"))
+# Paid orders older than this move to the archive collection; 0 disables
+PAYMENT_ARCHIVE_AFTER_DAYS = int(os.getenv("PAYMENT_ARCHIVE_AFTER_DAYS", "30"))
+PAYMENT_ARCHIVE_BATCH_SIZE = int(os.getenv("PAYMENT_ARCHIVE_BATCH_SIZE", "500"))
+PAYMENT_ARCHIVE_INTERVAL_SECONDS = int(os.getenv("PAYMENT_ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+PAYMENTS_COLLECTION = "payments"
+ARCHIVE_COLLECTION = "payments_archive"
+UNPAID_TTL_INDEX = "unpaid_ttl"
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_KEY_SPECS_CONFLICT = 86
+
+# Marker document that makes the timestamp backfill run once across all workers
+BACKFILL_MARKER_ID = "payments_timestamp_backfill"
+# An unfinished claim older than this is assumed dead and may be taken over
+BACKFILL_CLAIM_TIMEOUT = timedelta(hours=1)
+
+# Fields kept for archived payments
+ARCHIVE_FIELDS = ["order_id", "payment_id", "user_id", "amount", "status", "created_at", "paid_at"]
+
+_lifecycle_task = None
+
+async def backfill_payment_timestamps(db) -> int:
+    """
+    Set missing created_at/paid_at on payments written before lifecycle tracking.
+
+    Timestamps are taken from the ObjectId generation time, so legacy unpaid
+    orders become eligible for TTL expiry and legacy paid orders for archiving.
+    Documents that already have the field are left untouched.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        Number of documents updated
+    """
+    payments = db[PAYMENTS_COLLECTION]
+    created = await payments.update_many(
+        {"created_at": {"$exists": False}},
+        [{"$set": {"created_at": {"$toDate": "$_id"}}}]
+    )
+    paid = await payments.update_many(
+        {"status": "paid", "paid_at": {"$exists": False}},
+        [{"$set": {"paid_at": {"$toDate": "$_id"}}}]
+    )
+    return created.modified_count + paid.modified_count
+
+async def backfill_payment_timestamps_once(db) -> int:
+    """
+    Run backfill_payment_timestamps once across all workers and restarts.
+
+    A worker claims a marker document in the config collection before
+    scanning; others skip the job once it is claimed or completed. A failed
+    run releases its claim so the next startup retries it.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        Number of documents updated, or 0 if another worker owns the job
+    """
+    config = db[CONFIG_COLLECTION]
+    now = datetime.utcnow()
+    try:
+        # Matches only a missing or stale unfinished marker; otherwise the
+        # upsert collides on _id and the job belongs to someone else
+        await config.update_one(
+            {
+                "_id": BACKFILL_MARKER_ID,
+                "completed_at": {"$exists": False},
+                "started_at": {"$lt": now - BACKFILL_CLAIM_TIMEOUT}
+            },
+            {"$set": {"started_at": now}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return 0
+
+    try:
+        count = await backfill_payment_timestamps(db)
+    except Exception:
+        await config.delete_one({"_id": BACKFILL_MARKER_ID, "started_at": now})
+        raise
+    await config.update_one(
+        {"_id": BACKFILL_MARKER_ID},
+        {"$set": {"completed_at": datetime.utcnow(), "updated": count}}
+    )
+    return count
+
+async def ensure_payment_indexes(db):
+    """
+    Create the indexes the payment lifecycle relies on.
+
+    Each build is attempted separately; a failure (e.g. legacy duplicate
+    order_ids) is logged and the app keeps serving without that index.
+
+    Args:
+        db: Database instance
+    """
+    payments = db[PAYMENTS_COLLECTION]
+    archive = db[ARCHIVE_COLLECTION]
+    builds = [
+        ("payments.order_id", payments.create_index("order_id", unique=True)),
+        ("payments.status_paid_at", payments.create_index([("status", 1), ("paid_at", 1)])),
+        (f"payments.{UNPAID_TTL_INDEX}", ensure_unpaid_ttl_index(db)),
+        ("payments_archive.order_id", archive.create_index("order_id", unique=True)),
+        ("payments_archive.user_id", archive.create_index("user_id")),
+    ]
+    for name, build in builds:
+        try:
+            await build
+        except Exception as e:
+            print(f"❌ Failed to create index {name}: {e}")
+
+async def ensure_unpaid_ttl_index(db):
+    """
+    Apply PAYMENT_UNPAID_TTL_SECONDS to the unpaid-order TTL index.
+
+    The index only covers documents still in "created" status, so paid
+    orders never expire. A changed expiry is applied with collMod; an index
+    whose keys or partial filter differ is dropped and rebuilt. A setting of
+    0 or less drops the index left by an earlier deploy.
+
+    Args:
+        db: Database instance
+    """
+    payments = db[PAYMENTS_COLLECTION]
+    if PAYMENT_UNPAID_TTL_SECONDS <= 0:
+        if UNPAID_TTL_INDEX in await payments.index_information():
+            await payments.drop_index(UNPAID_TTL_INDEX)
+        return
+
+    keys = [("created_at", 1)]
+    partial_filter = {"status": "created"}
+    options = {
+        "name": UNPAID_TTL_INDEX,
+        "expireAfterSeconds": PAYMENT_UNPAID_TTL_SECONDS,
+        "partialFilterExpression": partial_filter,
+    }
+    try:
+        await payments.create_index(keys, **options)
+    except OperationFailure as e:
+        if e.code not in (INDEX_OPTIONS_CONFLICT, INDEX_KEY_SPECS_CONFLICT):
+            raise
+        existing = (await payments.index_information()).get(UNPAID_TTL_INDEX)
+        if existing is None:
+            # The conflict is with an index under another name; leave it to an operator
+            raise
+        if existing["key"] != keys or dict(existing.get("partialFilterExpression") or {}) != partial_filter:
+            # collMod cannot change keys or the filter; a stale filter could expire paid orders
+            await payments.drop_index(UNPAID_TTL_INDEX)
+            await payments.create_index(keys, **options)
+        else:
+            await db.command({
+                "collMod": PAYMENTS_COLLECTION,
+                "index": {"name": UNPAID_TTL_INDEX, "expireAfterSeconds": PAYMENT_UNPAID_TTL_SECONDS}
+            })
+
+async def archive_settled_payments(db, older_than_days: int = None, batch_size: int = None) -> int:
+    """
+    Move paid payments older than the cutoff into the archive collection.
+
+    Each batch is upserted into the archive before it is deleted from the
+    hot collection, so an interrupted run can simply be repeated.
+
+    Args:
+        db: Database instance
+        older_than_days: Archive payments paid before this many days ago
+        batch_size: Number of documents moved per batch
+
+    Returns:
+        Number of payments archived
+    """
+    days = older_than_days if older_than_days is not None else PAYMENT_ARCHIVE_AFTER_DAYS
+    size = batch_size if batch_size is not None else PAYMENT_ARCHIVE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    projection = {field: 1 for field in ARCHIVE_FIELDS}
+    payments = db[PAYMENTS_COLLECTION]
+    archive = db[ARCHIVE_COLLECTION]
+
+    archived = 0
+    while True:
+        batch = await payments.find(
+            {"status": "paid", "paid_at": {"$lt": cutoff}}, projection
+        ).limit(size).to_list(length=size)
+        if not batch:
+            break
+
+        await archive.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch],
+            ordered=False
+        )
+        await payments.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        archived += len(batch)
+
+        if len(batch) < size:
+            break
+    return archived
+
+async def find_payment(db, query: dict):
+    """
+    Find a payment, falling through to the archive if it is not in the hot collection.
+
+    Args:
+        db: Database instance
+        query: MongoDB filter, e.g. {"order_id": ...}
+
+    Returns:
+        Payment document or None if not found
+    """
+    payment = await db[PAYMENTS_COLLECTION].find_one(query)
+    if payment is None:
+        payment = await db[ARCHIVE_COLLECTION].find_one(query)
+    return payment
+
+async def _run_archiver(db):
+    """Archive settled payments every PAYMENT_ARCHIVE_INTERVAL_SECONDS."""
+    while True:
+        try:
+            count = await archive_settled_payments(db)
+            if count:
+                print(f"📦 Archived {count} settled payments")
+        except Exception as e:
+            print(f"❌ Payment archiving failed: {e}")
+        await asyncio.sleep(PAYMENT_ARCHIVE_INTERVAL_SECONDS)
+
+async def _run_lifecycle(db):
+    """Set up indexes, backfill legacy timestamps, then keep archiving."""
+    await ensure_payment_indexes(db)
+    try:
+        count = await backfill_payment_timestamps_once(db)
+        if count:
+            print(f"🕒 Backfilled timestamps on {count} payments")
+    except Exception as e:
+        print(f"❌ Failed to backfill payment timestamps: {e}")
+    if PAYMENT_ARCHIVE_AFTER_DAYS > 0:
+        await _run_archiver(db)
+
+def start_payment_lifecycle(db):
+    """Start index setup, the one-off backfill and the archiver in the background."""
+    global _lifecycle_task
+    if _lifecycle_task is None:
+        _lifecycle_task = asyncio.create_task(_run_lifecycle(db))
+
+async def stop_payment_lifecycle():
+    """Cancel background payment lifecycle work."""
+    global _lifecycle_task
+    if _lifecycle_task is not None:
+        _lifecycle_task.cancel()
+        try:
+            await _lifecycle_task
+        except asyncio.CancelledError:
+            pass
+        _lifecycle_task = None
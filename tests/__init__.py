@@ -0,0 +1 @@
+# Test Package
\ No newline at end of file
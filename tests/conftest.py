@@ -0,0 +1,120 @@
+import copy
+from types import SimpleNamespace
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+def _matches_value(value, condition) -> bool:
+    """Match a single field value against a literal or operator condition."""
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        for op, arg in condition.items():
+            if op == "$exists" and (value is not None) != arg:
+                return False
+            if op == "$ne" and value == arg:
+                return False
+            if op == "$lt" and (value is None or not value < arg):
+                return False
+            if op == "$in" and value not in arg:
+                return False
+        return True
+    return value == condition
+
+def _matches(doc: dict, query: dict) -> bool:
+    return all(_matches_value(doc.get(field), condition) for field, condition in query.items())
+
+class FakeCursor:
+    """Just enough of a Motor cursor for find().limit().to_list()."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def limit(self, count: int):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length: int = None):
+        return self.docs[:length]
+
+class FakeCollection:
+    """In-memory stand-in for a Motor collection covering the calls the app makes."""
+
+    def __init__(self, unique=("_id",)):
+        self.docs = []
+        self.unique = unique
+
+    def _check_unique(self, doc: dict, ignore: dict = None):
+        for field in self.unique:
+            if field in doc and any(d is not ignore and d.get(field) == doc[field] for d in self.docs):
+                raise DuplicateKeyError(f"duplicate {field}")
+
+    async def insert_one(self, doc: dict):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", ObjectId())
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def find_one(self, query: dict):
+        for doc in self.docs:
+            if _matches(doc, query):
+                return copy.deepcopy(doc)
+        return None
+
+    def find(self, query: dict, projection: dict = None):
+        docs = [d for d in self.docs if _matches(d, query)]
+        if projection:
+            docs = [{k: v for k, v in d.items() if k == "_id" or k in projection} for d in docs]
+        return FakeCursor(copy.deepcopy(docs))
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        for doc in self.docs:
+            if _matches(doc, query):
+                doc.update(copy.deepcopy(update.get("$set", {})))
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        doc = {k: v for k, v in query.items() if not (isinstance(v, dict) and any(op.startswith("$") for op in v))}
+        doc.update(copy.deepcopy(update.get("$set", {})))
+        doc.update(copy.deepcopy(update.get("$setOnInsert", {})))
+        result = await self.insert_one(doc)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=result.inserted_id)
+
+    async def update_many(self, query: dict, pipeline: list):
+        # Only the {"$set": {field: {"$toDate": "$_id"}}} pipeline stage is supported
+        modified = 0
+        for doc in self.docs:
+            if _matches(doc, query):
+                for stage in pipeline:
+                    for field in stage["$set"]:
+                        doc[field] = doc["_id"].generation_time.replace(tzinfo=None)
+                modified += 1
+        return SimpleNamespace(matched_count=modified, modified_count=modified)
+
+    async def bulk_write(self, requests: list, ordered: bool = True):
+        for request in requests:
+            await self.delete_many(request._filter)
+            await self.insert_one(request._doc)
+
+    async def delete_one(self, query: dict):
+        for doc in self.docs:
+            if _matches(doc, query):
+                self.docs.remove(doc)
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    async def delete_many(self, query: dict):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+class FakeDatabase(dict):
+    """Collections are created on first access, like a Motor database."""
+
+    def __missing__(self, name: str):
+        unique = ("_id", "order_id") if name.startswith("payments") else ("_id",)
+        self[name] = FakeCollection(unique)
+        return self[name]
+
+@pytest.fixture
+def fake_db():
+    return FakeDatabase()
@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from app.utils import hashing
+
+def _hash_at(rounds: int) -> str:
+    """A bcrypt-shaped hash string; needs_rehash only reads the cost."""
+    return f"$2b${rounds:02d}$" + "a" * 53
+
+@pytest.fixture(autouse=True)
+def default_rounds(monkeypatch):
+    monkeypatch.delenv("BCRYPT_ROUNDS", raising=False)
+    monkeypatch.setattr(hashing, "BCRYPT_MIN_ROUNDS", 10)
+    monkeypatch.setattr(hashing, "BCRYPT_MAX_ROUNDS", 16)
+    monkeypatch.setattr(hashing, "BCRYPT_TARGET_MS", 250.0)
+    monkeypatch.setattr(hashing, "_rounds", 12)
+
+@pytest.fixture
+def hash_time(monkeypatch):
+    """Stub the hash timer; returns a dict whose "seconds" sets the measured time."""
+    timing = {"seconds": 0.06, "calls": 0}
+
+    def fake_time_hash(rounds, samples=3):
+        timing["calls"] += 1
+        return timing["seconds"]
+
+    monkeypatch.setattr(hashing, "_time_hash", fake_time_hash)
+    return timing
+
+def test_needs_rehash_only_when_cost_differs():
+    assert not hashing.needs_rehash(_hash_at(12))
+    assert hashing.needs_rehash(_hash_at(11))
+    assert hashing.needs_rehash(_hash_at(13))
+
+def test_needs_rehash_downgrades_when_budget_lowered():
+    hashing.set_rounds(10)
+    assert hashing.needs_rehash(_hash_at(14))
+
+def test_needs_rehash_ignores_malformed_hash():
+    assert not hashing.needs_rehash("not-a-bcrypt-hash")
+
+def test_set_rounds_clamps_to_bounds():
+    hashing.set_rounds(18)
+    assert hashing.get_rounds() == 16
+    assert not hashing.needs_rehash(_hash_at(16))
+    hashing.set_rounds(4)
+    assert hashing.get_rounds() == 10
+
+def test_pinned_rounds_are_clamped(monkeypatch, hash_time):
+    monkeypatch.setenv("BCRYPT_ROUNDS", "18")
+    assert hashing.calibrate_rounds() == 16
+    assert hash_time["calls"] == 0
+
+def test_calibrate_rounds_fits_budget(hash_time):
+    # 60ms at cost 10 -> 120ms at 11 -> 240ms at 12; 480ms at 13 is over budget
+    assert hashing.calibrate_rounds() == 12
+    assert hashing.get_rounds() == 12
+
+def test_calibrate_rounds_respects_max(hash_time):
+    hash_time["seconds"] = 0.001
+    assert hashing.calibrate_rounds() == 16
+
+def test_calibrate_rounds_respects_min(hash_time):
+    hash_time["seconds"] = 1.0
+    assert hashing.calibrate_rounds() == 10
+
+def test_load_or_calibrate_rounds_stores_settings(fake_db, hash_time):
+    assert asyncio.run(hashing.load_or_calibrate_rounds(fake_db)) == 12
+    stored = fake_db["config"].docs[0]
+    assert stored == {
+        "_id": hashing.BCRYPT_CONFIG_ID,
+        "rounds": 12,
+        "target_ms": 250.0,
+        "min_rounds": 10,
+        "max_rounds": 16,
+    }
+
+def test_load_or_calibrate_rounds_reuses_stored_value(fake_db, hash_time):
+    asyncio.run(hashing.load_or_calibrate_rounds(fake_db))
+    hash_time["seconds"] = 0.001
+    assert asyncio.run(hashing.load_or_calibrate_rounds(fake_db)) == 12
+    assert hash_time["calls"] == 1
+
+def test_load_or_calibrate_rounds_recalibrates_when_target_changes(fake_db, hash_time, monkeypatch):
+    asyncio.run(hashing.load_or_calibrate_rounds(fake_db))
+    monkeypatch.setattr(hashing, "BCRYPT_TARGET_MS", 100.0)
+    assert asyncio.run(hashing.load_or_calibrate_rounds(fake_db)) == 10
+    assert fake_db["config"].docs[0]["target_ms"] == 100.0
+
+def test_load_or_calibrate_rounds_requires_database():
+    with pytest.raises(RuntimeError):
+        asyncio.run(hashing.load_or_calibrate_rounds(None))
+    assert hashing.get_rounds() == 12
+
+def test_hash_and_verify_round_trip():
+    hashing.set_rounds(10)
+    hashed = hashing.hash_password("s3cret")
+    assert hashing.get_hash_rounds(hashed) == 10
+    assert hashing.verify_password("s3cret", hashed)
+    assert not hashing.verify_password("wrong", hashed)
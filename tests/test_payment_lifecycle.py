@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.utils import payment_lifecycle
+from app.utils.payment_lifecycle import (
+    ARCHIVE_FIELDS,
+    archive_settled_payments,
+    backfill_payment_timestamps_once,
+    find_payment,
+)
+
+def _payment(order_id: str, status: str = "paid", paid_days_ago: int = 60) -> dict:
+    doc = {
+        "_id": ObjectId(),
+        "order_id": order_id,
+        "user_id": "user@example.com",
+        "amount": 100,
+        "status": status,
+        "created_at": datetime.utcnow() - timedelta(days=paid_days_ago),
+        "notes": "dropped from the archive",
+    }
+    if status == "paid":
+        doc["paid_at"] = datetime.utcnow() - timedelta(days=paid_days_ago)
+    return doc
+
+def _seed(fake_db):
+    payments = fake_db["payments"]
+    payments.docs = [_payment(f"order_old_{i}") for i in range(5)]
+    payments.docs.append(_payment("order_recent", paid_days_ago=1))
+    payments.docs.append(_payment("order_unpaid", status="created"))
+    return payments
+
+def test_archive_moves_old_paid_payments_in_batches(fake_db):
+    payments = _seed(fake_db)
+
+    archived = asyncio.run(archive_settled_payments(fake_db, older_than_days=30, batch_size=2))
+
+    assert archived == 5
+    assert sorted(d["order_id"] for d in payments.docs) == ["order_recent", "order_unpaid"]
+    archive = fake_db["payments_archive"].docs
+    assert len(archive) == 5
+    assert all(set(d) <= {"_id", *ARCHIVE_FIELDS} for d in archive)
+
+def test_archive_is_idempotent_after_interrupted_run(fake_db):
+    payments = _seed(fake_db)
+    # A previous run copied this payment but died before deleting it
+    fake_db["payments_archive"].docs.append(dict(payments.docs[0]))
+
+    archived = asyncio.run(archive_settled_payments(fake_db, older_than_days=30, batch_size=2))
+
+    assert archived == 5
+    assert len(fake_db["payments_archive"].docs) == 5
+
+def test_find_payment_falls_through_to_archive(fake_db):
+    _seed(fake_db)
+    asyncio.run(archive_settled_payments(fake_db, older_than_days=30))
+
+    assert asyncio.run(find_payment(fake_db, {"order_id": "order_recent"}))["status"] == "paid"
+    assert asyncio.run(find_payment(fake_db, {"order_id": "order_old_0"}))["order_id"] == "order_old_0"
+    assert asyncio.run(find_payment(fake_db, {"order_id": "missing"})) is None
+
+def test_backfill_sets_missing_timestamps_once(fake_db):
+    payments = fake_db["payments"]
+    legacy_unpaid = {"_id": ObjectId(), "order_id": "legacy_unpaid", "status": "created"}
+    legacy_paid = {"_id": ObjectId(), "order_id": "legacy_paid", "status": "paid"}
+    payments.docs = [legacy_unpaid, legacy_paid]
+
+    assert asyncio.run(backfill_payment_timestamps_once(fake_db)) == 3
+    assert legacy_unpaid["created_at"] == legacy_unpaid["_id"].generation_time.replace(tzinfo=None)
+    assert legacy_paid["paid_at"] == legacy_paid["_id"].generation_time.replace(tzinfo=None)
+    assert "completed_at" in fake_db["config"].docs[0]
+
+    # Later startups skip the scan
+    payments.docs.append({"_id": ObjectId(), "order_id": "legacy_late", "status": "created"})
+    assert asyncio.run(backfill_payment_timestamps_once(fake_db)) == 0
+    assert "created_at" not in payments.docs[-1]
+
+def test_backfill_skips_while_another_worker_holds_the_claim(fake_db):
+    fake_db["config"].docs.append({
+        "_id": payment_lifecycle.BACKFILL_MARKER_ID,
+        "started_at": datetime.utcnow(),
+    })
+    fake_db["payments"].docs = [{"_id": ObjectId(), "order_id": "legacy", "status": "created"}]
+
+    assert asyncio.run(backfill_payment_timestamps_once(fake_db)) == 0
+    assert "created_at" not in fake_db["payments"].docs[0]
+
+def test_backfill_takes_over_a_stale_claim(fake_db):
+    fake_db["config"].docs.append({
+        "_id": payment_lifecycle.BACKFILL_MARKER_ID,
+        "started_at": datetime.utcnow() - timedelta(hours=2),
+    })
+    fake_db["payments"].docs = [{"_id": ObjectId(), "order_id": "legacy", "status": "created"}]
+
+    assert asyncio.run(backfill_payment_timestamps_once(fake_db)) == 1
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from app.models import TokenData
+from app.routes import payments
+
+ORDER_CREATED_AT = 1760000000
+
+class FakeRazorpay:
+    def __init__(self, valid_signature: bool = True):
+        self.fetched = []
+        self.utility = SimpleNamespace(verify_payment_signature=self._verify)
+        self.order = SimpleNamespace(fetch=self._fetch)
+        self.valid_signature = valid_signature
+
+    def _verify(self, params: dict):
+        if not self.valid_signature:
+            raise ValueError("bad signature")
+
+    def _fetch(self, order_id: str) -> dict:
+        self.fetched.append(order_id)
+        return {"id": order_id, "amount": 49900, "currency": "INR", "created_at": ORDER_CREATED_AT}
+
+@pytest.fixture
+def razorpay_client(monkeypatch):
+    client = FakeRazorpay()
+    monkeypatch.setattr(payments, "razorpay_client", client)
+    return client
+
+@pytest.fixture
+def db(monkeypatch, fake_db):
+    monkeypatch.setattr(payments, "get_database", lambda: fake_db)
+    return fake_db
+
+def _verify(order_id: str = "order_1", payment_id: str = "pay_1") -> dict:
+    user = TokenData(username="user@example.com")
+    return asyncio.run(payments.verify_payment(order_id, payment_id, "sig", current_user=user))
+
+def test_verify_marks_created_order_paid(db, razorpay_client):
+    db["payments"].docs.append({"_id": 1, "order_id": "order_1", "status": "created", "amount": 499})
+
+    assert _verify() == {"status": "Payment Verified"}
+
+    doc = db["payments"].docs[0]
+    assert doc["status"] == "paid"
+    assert doc["payment_id"] == "pay_1"
+    assert isinstance(doc["paid_at"], datetime)
+    assert razorpay_client.fetched == []
+
+def test_verify_rebuilds_expired_order_from_razorpay(db, razorpay_client):
+    assert _verify() == {"status": "Payment Verified"}
+
+    assert razorpay_client.fetched == ["order_1"]
+    [doc] = db["payments"].docs
+    assert doc["status"] == "paid"
+    assert doc["payment_id"] == "pay_1"
+    assert doc["user_id"] == "user@example.com"
+    assert doc["amount"] == 499
+    assert doc["created_at"] == datetime.utcfromtimestamp(ORDER_CREATED_AT)
+
+def test_repeat_verification_keeps_original_payment(db, razorpay_client):
+    _verify()
+    first = dict(db["payments"].docs[0])
+
+    assert _verify(payment_id="pay_2") == {"status": "Payment Verified"}
+
+    [doc] = db["payments"].docs
+    assert doc["payment_id"] == first["payment_id"]
+    assert doc["paid_at"] == first["paid_at"]
+
+def test_verify_of_archived_order_changes_nothing(db, razorpay_client):
+    db["payments_archive"].docs.append({"_id": 1, "order_id": "order_1", "status": "paid"})
+
+    assert _verify() == {"status": "Payment Verified"}
+
+    assert db["payments"].docs == []
+    assert razorpay_client.fetched == []
+
+def test_invalid_signature_is_rejected(db, razorpay_client):
+    razorpay_client.valid_signature = False
+    db["payments"].docs.append({"_id": 1, "order_id": "order_1", "status": "created"})
+
+    assert _verify() == {"status": "Verification Failed"}
+    assert db["payments"].docs[0]["status"] == "created"